@@ -5,8 +5,11 @@ import shutil
 import logging
 import json
 import mmap
-import subprocess
-import sys
+import threading
+import queue
+from collections import defaultdict, Counter
+import argparse
+import time
 
 # Load configuration settings from config file
 def load_config(config_file="config.json"):
@@ -15,141 +18,533 @@ def load_config(config_file="config.json"):
 
 config = load_config()
 
-# Function to install missing packages
-def install_package(package):
-    try:
-        subprocess.check_call([sys.executable, "-m", "ensurepip", "--upgrade"])
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to install {package}. Please install it manually.")
-        exit(1)
-
-# Check for pip installation
-try:
-    import pip
-except ImportError:
-    print("pip is not installed. Please install pip first.")
-    exit(1)
-
-# Check for xxhash installation
+# Check for required packages; install them with 'pip install -r requirements.txt'
 try:
     import xxhash
-except ImportError:
-    print("xxhash module not found. Installing...")
-    install_package("xxhash")
-    import xxhash
-
-# Check for tqdm installation
-try:
-    from tqdm import tqdm
-except ImportError:
-    print("tqdm module not found. Installing...")
-    install_package("tqdm")
+    import orjson
     from tqdm import tqdm
+except ImportError as e:
+    print(f"{e.name} module not found. Please install the requirements with 'pip install -r requirements.txt'.")
+    exit(1)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename=config['log_file'], filemode='w')
 
+# Files at least this large are hashed through mmap; for smaller files the
+# mapping setup would dominate the cost
+MMAP_THRESHOLD = 1024 * 1024
+
+# Files below the mmap threshold are read through a reused buffer of this size,
+# so they take a single read
+READ_CHUNK_SIZE = MMAP_THRESHOLD
+
+# Number of leading bytes hashed to rule out most same-sized files cheaply
+HEAD_SIZE = 64 * 1024
+
+# Head hashes are computed in batches of this many files per worker task, so
+# executor and future overhead is paid once per batch rather than per file
+HEAD_BATCH_SIZE = 64
+
+# Maximum number of large files mapped into memory at once, to keep RSS bounded
+MAX_MMAPS_IN_FLIGHT = 4
+
+# Maximum number of threads listing directories while the scan runs; fewer are
+# used on devices where io_workers limits concurrency
+WALK_WORKERS = 8
+
+# Digest algorithm recorded in reports and temp files; digests written with any
+# other algorithm (the original reports used xxh64) are discarded on load
+HASH_ALGORITHM = 'xxh3_64'
+
+# Digest fields of a file record; raw bytes in memory, hex strings in JSON
+HASH_FIELDS = ('head_hash', 'hash')
+
+# Per-thread scratch state reused across files by the hashing workers
+_thread_local = threading.local()
+_mmap_slots = threading.BoundedSemaphore(MAX_MMAPS_IN_FLIGHT)
+
+def is_rotational(path):
+    """Return True if the path lives on a spinning disk (Linux only, else False)."""
+    # Device numbers cannot be split without os.major/os.minor (e.g. on Windows)
+    if not hasattr(os, 'major') or not hasattr(os, 'minor'):
+        return False
+    try:
+        dev = os.stat(path).st_dev
+        sys_path = os.path.realpath(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+        # Partitions keep their queue settings on the parent device
+        for device_path in (sys_path, os.path.dirname(sys_path)):
+            rotational_file = os.path.join(device_path, 'queue', 'rotational')
+            if os.path.exists(rotational_file):
+                with open(rotational_file, 'r') as f:
+                    return f.read().strip() == '1'
+    except OSError:
+        pass
+    return False
+
+def io_workers(directories):
+    """Choose the hashing thread count for the devices backing the directories."""
+    if any(is_rotational(directory) for directory in directories):
+        # Concurrent reads make a spinning disk seek back and forth
+        return 2
+    return min(16, os.cpu_count() or 1)
+
+def read_buffer(size):
+    """Return this thread's reusable read buffer, grown to at least size bytes."""
+    buf = getattr(_thread_local, 'buf', None)
+    if buf is None or len(buf) < size:
+        buf = _thread_local.buf = bytearray(size)
+    return buf
+
+def thread_hasher():
+    """Return this thread's XXH3 state, reset for a new file."""
+    hash_xx = getattr(_thread_local, 'hasher', None)
+    if hash_xx is None:
+        hash_xx = _thread_local.hasher = xxhash.xxh3_64()
+    else:
+        hash_xx.reset()
+    return hash_xx
+
+def read_fully(f, view):
+    """Read from f into view until it is full or EOF is reached; return the byte count."""
+    total = 0
+    while total < len(view):
+        bytes_read = f.readinto(view[total:])
+        if not bytes_read:
+            break
+        total += bytes_read
+    return total
+
 def file_hash(file_path):
-    """Compute the xxHash of the given file."""
-    hash_xx = xxhash.xxh64()
+    """Compute the XXH3 hash of the given file."""
+    hash_xx = thread_hasher()
+    try:
+        # Unbuffered, so reads go straight from the kernel into our buffer
+        with open(file_path, "rb", buffering=0) as f:
+            if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+                view = memoryview(read_buffer(READ_CHUNK_SIZE))[:READ_CHUNK_SIZE]
+                while True:
+                    bytes_read = read_fully(f, view)
+                    hash_xx.update(view[:bytes_read])
+                    if bytes_read < len(view):
+                        break
+            else:
+                # Hint the kernel that we read front to back so it reads ahead aggressively
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                with _mmap_slots, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    if hasattr(mmap, 'MADV_WILLNEED'):
+                        mm.madvise(mmap.MADV_WILLNEED)
+                    hash_xx.update(mm)
+                    # The data is never read again, so give the pages back instead
+                    # of letting them push more useful data out of the page cache
+                    if hasattr(mmap, 'MADV_DONTNEED'):
+                        mm.madvise(mmap.MADV_DONTNEED)
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        return hash_xx.digest()
+    except Exception as e:
+        logging.error(f"Error reading {file_path}: {e}")
+        return None
+
+def file_head_hash(file_path, n=HEAD_SIZE):
+    """Compute the XXH3 hash of the first n bytes of the given file."""
+    view = memoryview(read_buffer(n))[:n]
     try:
-        with open(file_path, "rb") as f:
-            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
-                hash_xx.update(mm)
-        return hash_xx.hexdigest()
+        with open(file_path, "rb", buffering=0) as f:
+            bytes_read = read_fully(f, view)
+        return xxhash.xxh3_64_digest(view[:bytes_read])
     except Exception as e:
         logging.error(f"Error reading {file_path}: {e}")
         return None
 
+def benchmark_hash(total_bytes=1024 ** 3, chunk_size=64 * 1024 * 1024):
+    """Hash total_bytes of in-memory data and return the XXH3 throughput in GB/s."""
+    # Hash one buffer repeatedly so the benchmark does not need total_bytes of RAM
+    buf = os.urandom(chunk_size)
+    hash_xx = xxhash.xxh3_64()
+    start = time.perf_counter()
+    for _ in range(total_bytes // chunk_size):
+        hash_xx.update(buf)
+    elapsed = time.perf_counter() - start
+    return (total_bytes // chunk_size) * chunk_size / elapsed / 1e9
+
+def batched(items, batch_size):
+    """Yield lists of up to batch_size consecutive items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def hash_batch(hash_func, file_paths):
+    """Hash a batch of files within one worker task, returning hashes in order."""
+    return [hash_func(file_path) for file_path in file_paths]
+
+def hash_files(hash_func, file_paths, desc, max_workers=None, batch_size=1):
+    """Hash files in parallel, yielding (file_path, hash) pairs as they complete."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # file_paths may be a generator; hashing starts while it is still producing
+        futures = {executor.submit(hash_batch, hash_func, batch): batch for batch in batched(file_paths, batch_size)}
+
+        with tqdm(total=sum(len(batch) for batch in futures.values()), desc=desc, unit="file") as pbar:
+            for future in as_completed(futures):
+                batch = futures[future]
+                yield from zip(batch, future.result())
+                pbar.update(len(batch))
+
+def build_file_info(file_path, file_stat, file_hash_result, head_hash=None):
+    """Build the information record stored for a single file."""
+    return {
+        'name': os.path.basename(file_path),
+        'head_hash': head_hash,
+        'hash': file_hash_result,
+        'size': file_stat.st_size,
+        'modified_time': file_stat.st_mtime,
+        'device': file_stat.st_dev,
+        'inode': file_stat.st_ino
+    }
+
+def scan_directory(directory, ignore_prefixes):
+    """List one directory, returning its (path, stat) files not matching ignore_prefixes and its subdirectories."""
+    files = []
+    subdirectories = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # Like os.walk, do not descend into symlinked directories
+                        if not entry.is_symlink():
+                            subdirectories.append(entry.path)
+                    elif not entry.name.startswith(ignore_prefixes):
+                        files.append((entry.path, entry.stat()))
+                except OSError as e:
+                    logging.error(f"Error reading {entry.path}: {e}")
+    except OSError as e:
+        logging.error(f"Error reading {directory}: {e}")
+    return files, subdirectories
+
+def walk_files(directories, ignore_prefixes, max_workers=WALK_WORKERS):
+    """Walk directories on a pool of threads, yielding (path, stat) for each file as it is found."""
+    if not directories:
+        return
+
+    # Each walker lists one directory, queues its files and hands its
+    # subdirectories back to the pool; the last one to finish ends the walk
+    results = queue.Queue()
+    pending = len(directories)
+    pending_lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def walk(directory):
+            nonlocal pending
+            try:
+                files, subdirectories = scan_directory(directory, ignore_prefixes)
+                results.put(files)
+                with pending_lock:
+                    pending += len(subdirectories)
+                for subdirectory in subdirectories:
+                    executor.submit(walk, subdirectory)
+            finally:
+                with pending_lock:
+                    pending -= 1
+                    if pending == 0:
+                        results.put(None)
+
+        for directory in directories:
+            executor.submit(walk, directory)
+
+        while True:
+            files = results.get()
+            if files is None:
+                break
+            yield from files
+
+def dump_json(data, indent=False):
+    """Serialize data to JSON bytes, pretty-printed if indent is set."""
+    try:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    except TypeError:
+        # orjson rejects the surrogates os.scandir uses for file names that are
+        # not valid UTF-8; the stdlib encoder escapes them losslessly
+        return json.dumps(data, indent=2 if indent else None).encode()
+
+def load_json(data):
+    """Parse JSON bytes written by dump_json."""
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # Escaped surrogates from the stdlib fallback are only accepted by json
+        return json.loads(data)
+
+def encode_file_info(file_info_dict):
+    """Return a copy of the file information with digests as hex strings for JSON."""
+    encoded = {}
+    for file_path, file_info in file_info_dict.items():
+        file_info = dict(file_info)
+        for field in HASH_FIELDS:
+            if file_info.get(field) is not None:
+                file_info[field] = file_info[field].hex()
+        encoded[file_path] = file_info
+    return encoded
+
+def decode_file_info(file_info_dict):
+    """Convert hex digests in file information loaded from JSON back to bytes, in place."""
+    for file_info in file_info_dict.values():
+        for field in HASH_FIELDS:
+            if file_info.get(field) is not None:
+                file_info[field] = bytes.fromhex(file_info[field])
+    return file_info_dict
+
+def pack_file_info(file_info_dict):
+    """Wrap file information for a report or temp file, tagged with the hash algorithm."""
+    return {'hash_algorithm': HASH_ALGORITHM, 'files': encode_file_info(file_info_dict)}
+
+def unpack_file_info(data):
+    """Unwrap a report or temp file, dropping digests made with another hash algorithm."""
+    if data.get('hash_algorithm') == HASH_ALGORITHM:
+        return decode_file_info(data['files'])
+
+    # Reports from before the algorithm was recorded are a bare {path: info} dict
+    file_info_dict = data['files'] if 'hash_algorithm' in data else data
+    logging.warning(f"Discarding {data.get('hash_algorithm', 'xxh64')} hashes; files will be re-hashed with {HASH_ALGORITHM}")
+    for file_info in file_info_dict.values():
+        file_info['head_hash'] = None
+        file_info['hash'] = None
+    return file_info_dict
+
+def load_progress(temp_file):
+    """Load progress saved by an earlier run from the temp file and its log."""
+    file_info_dict = {}
+    if os.path.exists(temp_file):
+        with open(temp_file, 'rb') as f:
+            file_info_dict = unpack_file_info(load_json(f.read()))
+
+    # Replay results appended since the temp file was last consolidated
+    progress_file = temp_file + '.ndjson'
+    if os.path.exists(progress_file):
+        with open(progress_file, 'rb+') as f:
+            complete_size = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete_size += len(line)
+                try:
+                    file_info_dict.update(decode_file_info(load_json(line)))
+                except ValueError:
+                    logging.warning(f"Skipping unreadable line in {progress_file}")
+            # An interrupted run can leave a partial last line; cut it off so the
+            # next record is not appended onto it
+            f.truncate(complete_size)
+    return file_info_dict
+
+def write_json_atomic(data, output_file):
+    """Write data as JSON so that readers never see a partially written file."""
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(dump_json(data))
+    os.replace(tmp_file, output_file)
+
 def collect_file_info(directories, temp_file=config['temp_file']):
     """Collect file information including paths, names, hashes, and metadata."""
-    file_info_dict = {}
+    file_info_dict = load_progress(temp_file)
 
-    # Load existing progress if temp file exists
-    if os.path.exists(temp_file):
-        with open(temp_file, 'r') as f:
-            file_info_dict = json.load(f)
+    # Group files by size as they are found; a file with a unique size cannot
+    # have a duplicate
+    file_stats = {}
+    size_buckets = defaultdict(list)
+    # Hardlinks share an inode, so only the first path seen for it is bucketed
+    # and read; the others map to that path and copy its hashes
+    seen_inodes = {}
+    linked_paths = {}
+    # str.startswith checks a tuple of prefixes in C
+    ignore_prefixes = tuple(config['ignore_list'])
 
-    # Collect all file paths, ignoring hidden files and files in the ignore list
-    file_paths = []
-    for directory in directories:
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if not any(file.startswith(prefix) for prefix in config['ignore_list']):
-                    file_paths.append(os.path.join(root, file))
+    # Concurrent directory listings make a spinning disk seek as much as
+    # concurrent reads do, so the walk gets the same limit as hashing
+    max_workers = io_workers(directories)
+    walk_workers = min(WALK_WORKERS, max_workers)
 
-    with ThreadPoolExecutor() as executor:
-        futures = {executor.submit(file_hash, file_path): file_path for file_path in file_paths if file_path not in file_info_dict}
+    def paths_to_head_hash():
+        """Walk the directories, yielding each file as soon as another file shares its size."""
+        for file_path, file_stat in walk_files(directories, ignore_prefixes, walk_workers):
+            file_stats[file_path] = file_stat
+            # Some platforms report no inode numbers, which would merge unrelated files
+            if file_stat.st_ino:
+                first_path = seen_inodes.setdefault((file_stat.st_dev, file_stat.st_ino), file_path)
+                if first_path != file_path:
+                    linked_paths[file_path] = first_path
+                    continue
 
-        with tqdm(total=len(futures), desc="Processing files", unit="file") as pbar:
-            for future in as_completed(futures):
-                file_path = futures[future]
-                file_hash_result = future.result()
-                if file_hash_result:
-                    file_info = {
-                        'name': os.path.basename(file_path),
-                        'hash': file_hash_result,
-                        'size': os.path.getsize(file_path),
-                        'modified_time': os.path.getmtime(file_path)
-                    }
-                    file_info_dict[file_path] = file_info
-                pbar.update(1)
-
-                # Save progress periodically
-                if len(file_info_dict) % config['save_interval'] == 0:
-                    with open(temp_file, 'w') as f:
-                        json.dump(file_info_dict, f, indent=4)
-
-    # Save final progress
-    with open(temp_file, 'w') as f:
-        json.dump(file_info_dict, f, indent=4)
+            paths = size_buckets[file_stat.st_size]
+            paths.append(file_path)
+            # Empty files are usually markers or locks, not duplicates worth removing
+            if len(paths) < 2 or file_stat.st_size == 0:
+                continue
+            # The first file of a size only becomes a candidate once a second one turns up
+            for candidate in paths if len(paths) == 2 else paths[-1:]:
+                if not file_info_dict.get(candidate, {}).get('head_hash'):
+                    yield candidate
+
+    # Record each result as one appended line instead of rewriting the whole file
+    progress_file = temp_file + '.ndjson'
+    with open(progress_file, 'ab') as progress_log:
+        # First pass: hash only the head of each candidate file, overlapping
+        # with the directory walk
+        for completed, (file_path, head_hash) in enumerate(hash_files(file_head_hash, paths_to_head_hash(), "Hashing file heads", max_workers, HEAD_BATCH_SIZE), 1):
+            if head_hash:
+                file_info = file_info_dict.setdefault(file_path, build_file_info(file_path, file_stats[file_path], None))
+                file_info['head_hash'] = head_hash
+                progress_log.write(dump_json(encode_file_info({file_path: file_info})) + b"\n")
+
+            # Flush progress periodically
+            if completed % config['save_interval'] == 0:
+                progress_log.flush()
+
+        # Empty files and files whose size turned out to be unique are recorded
+        # without a hash
+        candidates = []
+        for size, paths in size_buckets.items():
+            if len(paths) > 1 and size > 0:
+                candidates.extend(paths)
+                continue
+            for file_path in paths:
+                if file_path not in file_info_dict:
+                    file_info_dict[file_path] = build_file_info(file_path, file_stats[file_path], None)
+
+        # Second pass: fully hash only files whose size and head hash both collide
+        head_buckets = defaultdict(list)
+        for file_path in candidates:
+            file_info = file_info_dict.get(file_path)
+            if file_info and file_info.get('head_hash'):
+                head_buckets[(file_info['size'], file_info['head_hash'])].append(file_path)
+
+        paths_to_hash = []
+        for paths in head_buckets.values():
+            if len(paths) < 2:
+                continue
+            for file_path in paths:
+                file_info = file_info_dict[file_path]
+                if file_info['hash']:
+                    continue
+                if file_info['size'] <= HEAD_SIZE:
+                    # The head covered the whole file, so it already is the full hash
+                    file_info['hash'] = file_info['head_hash']
+                else:
+                    paths_to_hash.append(file_path)
+
+        for completed, (file_path, file_hash_result) in enumerate(hash_files(file_hash, paths_to_hash, "Processing files", max_workers), 1):
+            if file_hash_result:
+                file_info_dict[file_path]['hash'] = file_hash_result
+                progress_log.write(dump_json(encode_file_info({file_path: file_info_dict[file_path]})) + b"\n")
+
+            # Flush progress periodically
+            if completed % config['save_interval'] == 0:
+                progress_log.flush()
+
+        # Other paths to an inode share its hashes; find_duplicates_from_info
+        # never pairs them with each other
+        for file_path, first_path in linked_paths.items():
+            file_info = file_info_dict.setdefault(file_path, build_file_info(file_path, file_stats[file_path], None))
+            file_info['head_hash'] = file_info_dict.get(first_path, {}).get('head_hash')
+            file_info['hash'] = file_info_dict.get(first_path, {}).get('hash')
+
+    # Consolidate progress into the temp file and discard the log
+    write_json_atomic(pack_file_info(file_info_dict), temp_file)
+    os.remove(progress_file)
 
     return file_info_dict
 
-def save_file_info(file_info_dict, output_file):
-    """Save file information to a JSON file."""
+def save_file_info(file_info_dict, output_file, indent=False):
+    """Save file information to a JSON file, pretty-printed if indent is set."""
     if os.path.isdir(output_file):
         print(f"Error: {output_file} is a directory. Saving to default file 'file_info_report.json'.")
         logging.error(f"Error: {output_file} is a directory. Saving to default file 'file_info_report.json'.")
         output_file = os.path.join(output_file, 'file_info_report.json')
-    with open(output_file, 'w') as f:
-        json.dump(file_info_dict, f, indent=4)
+    with open(output_file, 'wb') as f:
+        f.write(dump_json(pack_file_info(file_info_dict), indent))
 
 def load_file_info(input_file):
     """Load file information from a JSON file."""
-    with open(input_file, 'r') as f:
-        return json.load(f)
+    with open(input_file, 'rb') as f:
+        return unpack_file_info(load_json(f.read()))
 
 def verify_file_info(file_info_dict):
     """Verify the existence and integrity of files listed in the file information."""
     verified_file_info_dict = {}
-    with tqdm(total=len(file_info_dict), desc="Verifying files", unit="file") as pbar:
-        for file_path, file_info in file_info_dict.items():
-            if os.path.exists(file_path):
-                current_hash = file_hash(file_path)
-                if current_hash == file_info['hash']:
-                    verified_file_info_dict[file_path] = file_info
-                else:
-                    logging.warning(f"File hash changed: {file_path}")
-            else:
-                logging.warning(f"File not found: {file_path}")
-            pbar.update(1)
+
+    # Files without any hash that share their size with another file were
+    # loaded from a report made with another hash algorithm and need hashing
+    size_counts = Counter(file_info['size'] for file_info in file_info_dict.values())
+
+    # Only re-hash files that kept their recorded size but were modified since,
+    # or that lost their hash on load
+    file_stats = {}
+    for file_path, file_info in file_info_dict.items():
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            logging.warning(f"File not found: {file_path}")
+            continue
+        except OSError as e:
+            logging.error(f"Error reading {file_path}: {e}")
+            continue
+        if file_stat.st_size != file_info['size']:
+            logging.warning(f"File size changed: {file_path}")
+        elif file_info['hash'] is None and file_info.get('head_hash') is None and file_info['size'] > 0 and size_counts[file_info['size']] > 1:
+            file_stats[file_path] = file_stat
+        elif file_info['hash'] is None or file_stat.st_mtime == file_info['modified_time']:
+            # Never hashed (unique size) or untouched since recorded; trust the entry
+            verified_file_info_dict[file_path] = file_info
+        else:
+            file_stats[file_path] = file_stat
+
+    for file_path, current_hash in hash_files(file_hash, file_stats, "Verifying files", io_workers(config['directories'])):
+        if current_hash and file_info_dict[file_path]['hash'] is None:
+            # Nothing to compare against; record the hash in the current algorithm
+            file_info_dict[file_path]['hash'] = current_hash
+            file_info_dict[file_path]['modified_time'] = file_stats[file_path].st_mtime
+            verified_file_info_dict[file_path] = file_info_dict[file_path]
+        elif current_hash and current_hash == file_info_dict[file_path]['hash']:
+            # Content is unchanged, so record the new mtime to skip it next time
+            file_info_dict[file_path]['modified_time'] = file_stats[file_path].st_mtime
+            verified_file_info_dict[file_path] = file_info_dict[file_path]
+        else:
+            logging.warning(f"File hash changed: {file_path}")
     return verified_file_info_dict
 
+def same_inode(file_info, other_file_info):
+    """Return True if both records are paths to the same file on disk."""
+    # Older records lack inode numbers, and some platforms report them as 0
+    if not file_info.get('inode'):
+        return False
+    return (file_info.get('device'), file_info['inode']) == (other_file_info.get('device'), other_file_info.get('inode'))
+
 def find_duplicates_from_info(file_info_dict):
     """Find duplicates based on file information."""
     hashes = {}
     duplicates = []
 
     for file_path, file_info in file_info_dict.items():
-        file_hash_result = file_info['hash']
-        if file_hash_result in hashes:
-            duplicates.append((file_path, hashes[file_hash_result]))
-            logging.info(f"Duplicate found: {file_path} is a duplicate of {hashes[file_hash_result]}")
-        else:
-            hashes[file_hash_result] = file_path
+        # Files without a hash had a unique size and cannot be duplicates; empty
+        # files are never reported, as deleting them frees nothing
+        if file_info['hash'] is None or file_info['size'] == 0:
+            continue
+        first_path = hashes.setdefault((file_info['size'], file_info['hash']), file_path)
+        # Hardlinks and symlinks to the same file are not duplicates: removing
+        # one frees no space, and removing the target breaks a symlink
+        if first_path != file_path and not same_inode(file_info, file_info_dict[first_path]):
+            duplicates.append((file_path, first_path))
+
+    # Skip building one message per duplicate when INFO logging is disabled
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        for dup in duplicates:
+            logging.info(f"Duplicate found: {dup[0]} is a duplicate of {dup[1]}")
 
     if duplicates:
         print("Duplicates found:")
@@ -162,13 +557,10 @@ def find_duplicates_from_info(file_info_dict):
 
 def group_duplicates_by_directory(duplicates):
     """Group duplicates by directory."""
-    grouped_duplicates = {}
+    grouped_duplicates = defaultdict(list)
     for dup in duplicates:
-        dir_path = os.path.dirname(dup[0])
-        if dir_path not in grouped_duplicates:
-            grouped_duplicates[dir_path] = []
-        grouped_duplicates[dir_path].append(dup)
-    return grouped_duplicates
+        grouped_duplicates[os.path.dirname(dup[0])].append(dup)
+    return dict(grouped_duplicates)
 
 def handle_duplicates(grouped_duplicates):
     """Prompt user for action on each duplicate file."""
@@ -252,6 +644,20 @@ def handle_duplicates(grouped_duplicates):
             logging.info(f"Invalid action. Skipping directory: {dir_path}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find and manage duplicate files.")
+    parser.add_argument('--indent', action='store_true', help="pretty-print the saved report for human readers")
+    parser.add_argument('--check-simd', action='store_true', help="measure XXH3 throughput on 1 GB of in-memory data and exit")
+    args = parser.parse_args()
+
+    logging.info(f"Using xxhash {xxhash.VERSION} (libxxhash {xxhash.XXHASH_VERSION})")
+    if args.check_simd:
+        print(f"xxhash {xxhash.VERSION} (libxxhash {xxhash.XXHASH_VERSION})")
+        print(f"XXH3 throughput: {benchmark_hash():.2f} GB/s")
+        # The SSE2 fallback runs at a fraction of AVX2/AVX-512 speed
+        print("If this is far below memory bandwidth, rebuild xxhash for this CPU with:")
+        print("  CFLAGS='-march=native' pip install --no-binary xxhash --force-reinstall xxhash")
+        exit(0)
+
     directories = config['directories']
     if all(os.path.isdir(directory) for directory in directories):
         use_existing_report = input("Do you have an existing report file to load? (y/n): ").strip().lower()
@@ -261,7 +667,7 @@ if __name__ == "__main__":
                 file_info_dict = load_file_info(report_file)
                 print("Loaded file information from report.")
                 file_info_dict = verify_file_info(file_info_dict)
-                save_file_info(file_info_dict, report_file)  # Update the report file with verified info
+                save_file_info(file_info_dict, report_file, args.indent)  # Update the report file with verified info
                 print("Verified and updated file information.")
             else:
                 print(f"Invalid report file: {report_file}")
@@ -270,7 +676,7 @@ if __name__ == "__main__":
         else:
             file_info_dict = collect_file_info(directories)
             report_file = input("Enter the path to save the report file: ").strip()
-            save_file_info(file_info_dict, report_file)
+            save_file_info(file_info_dict, report_file, args.indent)
             print(f"File information saved to {report_file}")
 
         duplicates = find_duplicates_from_info(file_info_dict)